@@ -1,10 +1,20 @@
 from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
+from contextlib import asynccontextmanager
+import asyncio
 import httpx
-import hashlib
+import xxhash
 import logging
-from .utils.cache import get_from_cache, set_to_cache
+import tempfile
+import secrets
+from functools import lru_cache
+import msgspec
+from .utils.cache import (
+    get_from_cache, set_to_cache, get_many_from_cache, set_many_to_cache,
+    CachedOCRResult, CachedQueryResult
+)
 
 # Configure logging
 logging.basicConfig(
@@ -13,11 +23,32 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="RPG Rules Engine - Primary Agent")
-
 # Configuration
 OCR_SERVICE_URL = "http://ocr-engine:8000"
+OCR_REQUEST_TIMEOUT = 300.0  # OCR of large PDFs can take minutes
 PDF_CACHE_TTL = 604800  # 7 days in seconds
+UPLOAD_CHUNK_SIZE = 1 << 20  # Read uploads in 1 MiB slices
+SPOOL_MAX_SIZE = 8 << 20  # Spill uploads larger than 8 MiB to disk
+OCR_BATCH_CONCURRENCY = 4  # OCR requests in flight per /process-pdfs call
+DEFAULT_UPLOAD_NAME = "upload.pdf"  # Sent to the OCR service for unnamed uploads
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Share one connection pool to the OCR service across requests
+    app.state.http_client = httpx.AsyncClient(
+        timeout=OCR_REQUEST_TIMEOUT,
+        limits=httpx.Limits(max_keepalive_connections=50)
+    )
+    try:
+        yield
+    finally:
+        await app.state.http_client.aclose()
+
+app = FastAPI(
+    title="RPG Rules Engine - Primary Agent",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
+)
 
 class QueryRequest(BaseModel):
     query: str
@@ -37,10 +68,103 @@ class PDFProcessingResponse(BaseModel):
     metadata: Dict[str, Any]
     confidence: float
     cached: bool
+    error: Optional[str] = None
+
+def is_pdf_upload(file: UploadFile) -> bool:
+    """Check the declared content type, falling back to the file extension."""
+    if file.content_type == 'application/pdf':
+        return True
+    return file.filename is not None and file.filename[-4:].lower() == '.pdf'
+
+async def spool_upload(file: UploadFile) -> Tuple[str, tempfile.SpooledTemporaryFile, int]:
+    """
+    Hash an upload while spooling it, so a large PDF is never held in memory whole.
+
+    Returns the (non-cryptographic) content hash, the rewound spool file and
+    the upload's size.
+    """
+    hasher = xxhash.xxh3_128()
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    size = 0
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        hasher.update(chunk)
+        spool.write(chunk)
+        size += len(chunk)
+    spool.seek(0)
+    return hasher.hexdigest(), spool, size
+
+def pdf_cache_key(file_hash: str) -> str:
+    """Build the cache key for OCR results of a PDF with the given hash."""
+    return f"pdf:{{ocr}}:{file_hash}"
+
+@lru_cache(maxsize=4096)
+def query_cache_key(query: str) -> str:
+    """Normalize a query into a cache key, collapsing runs of whitespace."""
+    return f"traveller:{{query}}:{'_'.join(query.lower().split())}"
+
+async def stream_spool(head: bytes, spool, tail: bytes):
+    """Yield a multipart body around a spooled file, reading it off the event loop."""
+    yield head
+    while chunk := await asyncio.to_thread(spool.read, UPLOAD_CHUNK_SIZE):
+        yield chunk
+    yield tail
+
+async def forward_to_ocr(filename: Optional[str], spool, size: int) -> Dict[str, Any]:
+    """Send a spooled PDF to the OCR service and return its JSON result."""
+    client = app.state.http_client
+    filename = filename or DEFAULT_UPLOAD_NAME
+    url = f"{OCR_SERVICE_URL}/extract"
+    if size <= SPOOL_MAX_SIZE:
+        # Still in memory: send the bytes. Passing the spool itself would make
+        # httpx call fileno() to size it, rolling the spool over to disk.
+        files = {'file': (filename, spool.read(), 'application/pdf')}
+        response = await client.post(url, files=files)
+    else:
+        # On disk: build the multipart body by hand so the file is streamed
+        # in slices read in a worker thread, not read by httpx on the loop
+        boundary = secrets.token_hex(16)
+        # Percent-encode the characters that would break out of the quoted
+        # filename or its header line, as browsers do for form uploads
+        quoted_name = (
+            filename.replace('"', '%22').replace('\r', '%0D').replace('\n', '%0A')
+        )
+        head = (
+            f'--{boundary}\r\n'
+            f'Content-Disposition: form-data; name="file"; filename="{quoted_name}"\r\n'
+            'Content-Type: application/pdf\r\n\r\n'
+        ).encode()
+        tail = f'\r\n--{boundary}--\r\n'.encode()
+        response = await client.post(
+            url,
+            content=stream_spool(head, spool, tail),
+            headers={
+                'Content-Type': f'multipart/form-data; boundary={boundary}',
+                'Content-Length': str(len(head) + size + len(tail))
+            }
+        )
 
-def generate_file_hash(content: bytes) -> str:
-    """Generate a unique hash for the file content."""
-    return hashlib.sha256(content).hexdigest()
+    if response.status_code != 200:
+        logger.error(f"OCR service error: {response.text}")
+        raise HTTPException(status_code=502, detail="OCR service error")
+
+    result = response.json()
+    result['cached'] = False
+    return result
+
+def ocr_error_response(filename: str, error: BaseException) -> PDFProcessingResponse:
+    """Build the batch entry for a PDF that could not be OCRed."""
+    if isinstance(error, HTTPException):
+        message = error.detail
+    elif isinstance(error, httpx.RequestError):
+        logger.error(f"Error communicating with OCR service: {str(error)}")
+        message = "OCR service unavailable"
+    else:
+        logger.error(f"Unexpected error processing PDF {filename}: {str(error)}")
+        message = "Internal server error"
+    return PDFProcessingResponse(
+        text="", metadata={"filename": filename}, confidence=0.0,
+        cached=False, error=message
+    )
 
 @app.get("/", response_model=str)
 async def read_root():
@@ -51,56 +175,129 @@ async def process_pdf(file: UploadFile = File(...)):
     """
     Process a PDF file through the OCR service with caching support.
     """
-    if not file.filename.lower().endswith('.pdf'):
+    if not is_pdf_upload(file):
         raise HTTPException(status_code=400, detail="Only PDF files are supported")
 
+    spool = None
     try:
-        content = await file.read()
-        file_hash = generate_file_hash(content)
-        cache_key = f"pdf:ocr:{file_hash}"
+        file_hash, spool, size = await spool_upload(file)
+        cache_key = pdf_cache_key(file_hash)
 
         # Check cache first
-        cached_result = get_from_cache(cache_key)
+        cached_result = await get_from_cache(cache_key, CachedOCRResult)
         if cached_result:
             logger.info(f"Cache hit for PDF: {file.filename}")
-            cached_result['cached'] = True
-            return PDFProcessingResponse(**cached_result)
+            return PDFProcessingResponse(
+                **msgspec.structs.asdict(cached_result), cached=True
+            )
 
         logger.info(f"Processing new PDF: {file.filename}")
         
-        # Forward to OCR service
-        async with httpx.AsyncClient() as client:
-            files = {'file': (file.filename, content, 'application/pdf')}
-            response = await client.post(f"{OCR_SERVICE_URL}/extract", files=files)
-            
-            if response.status_code != 200:
-                logger.error(f"OCR service error: {response.text}")
-                raise HTTPException(status_code=502, detail="OCR service error")
-
-            result = response.json()
-            result['cached'] = False
-            
-            # Cache the result
-            set_to_cache(cache_key, result, PDF_CACHE_TTL)
-            logger.info(f"Cached OCR results for: {file.filename}")
-            
-            return PDFProcessingResponse(**result)
+        # Forward to OCR service, streaming the spooled upload
+        result = await forward_to_ocr(file.filename, spool, size)
+
+        # Cache the result
+        await set_to_cache(cache_key, result, PDF_CACHE_TTL)
+        logger.info(f"Cached OCR results for: {file.filename}")
+
+        return PDFProcessingResponse(**result)
 
+    except HTTPException:
+        raise
     except httpx.RequestError as e:
         logger.error(f"Error communicating with OCR service: {str(e)}")
         raise HTTPException(status_code=503, detail="OCR service unavailable")
     except Exception as e:
         logger.error(f"Unexpected error processing PDF: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
+    finally:
+        if spool is not None:
+            spool.close()
+
+@app.post("/process-pdfs", response_model=List[PDFProcessingResponse])
+async def process_pdfs(files: List[UploadFile] = File(...)):
+    """
+    Process several PDF files in one request.
+
+    Cache lookups are issued as a single MGET, cache misses are sent to the
+    OCR service a few at a time and all new results are written back in one
+    pipelined round-trip. A file that fails to OCR gets an entry with its
+    error instead of failing the whole batch.
+    """
+    for file in files:
+        if not is_pdf_upload(file):
+            raise HTTPException(status_code=400, detail="Only PDF files are supported")
+
+    spools = []
+    try:
+        cache_keys = []
+        sizes = []
+        for file in files:
+            file_hash, spool, size = await spool_upload(file)
+            spools.append(spool)
+            sizes.append(size)
+            cache_keys.append(pdf_cache_key(file_hash))
+
+        cached_results = await get_many_from_cache(cache_keys, CachedOCRResult)
+
+        responses: List[Optional[PDFProcessingResponse]] = [None] * len(files)
+        misses = []
+        for i, cached_result in enumerate(cached_results):
+            if cached_result:
+                responses[i] = PDFProcessingResponse(
+                    **msgspec.structs.asdict(cached_result), cached=True
+                )
+            else:
+                misses.append(i)
+
+        logger.info(f"Batch of {len(files)} PDFs: {len(files) - len(misses)} cache hits")
+
+        if misses:
+            limit = asyncio.Semaphore(OCR_BATCH_CONCURRENCY)
+
+            async def forward(i: int) -> Dict[str, Any]:
+                async with limit:
+                    return await forward_to_ocr(files[i].filename, spools[i], sizes[i])
+
+            results = await asyncio.gather(
+                *(forward(i) for i in misses), return_exceptions=True
+            )
+            await set_many_to_cache(
+                {
+                    cache_keys[i]: result for i, result in zip(misses, results)
+                    if not isinstance(result, BaseException)
+                },
+                PDF_CACHE_TTL
+            )
+            for i, result in zip(misses, results):
+                if isinstance(result, BaseException):
+                    responses[i] = ocr_error_response(files[i].filename, result)
+                else:
+                    responses[i] = PDFProcessingResponse(**result)
+
+        return responses
+
+    except HTTPException:
+        raise
+    except httpx.RequestError as e:
+        logger.error(f"Error communicating with OCR service: {str(e)}")
+        raise HTTPException(status_code=503, detail="OCR service unavailable")
+    except Exception as e:
+        logger.error(f"Unexpected error processing PDF batch: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+    finally:
+        for spool in spools:
+            spool.close()
 
 @app.post("/query", response_model=QueryResponse)
 async def query_rules(request: QueryRequest):
     # Normalize the query to generate a cache key.
-    key = f"traveller:query:{request.query.lower().replace(' ', '_')}"
-    cached_result = get_from_cache(key)
+    key = query_cache_key(request.query)
+    cached_result = await get_from_cache(key, CachedQueryResult)
     if cached_result:
         logger.info(f"Cache hit for query: {request.query}")
-        return cached_result
+        # Cached payloads were validated when written; skip re-validation
+        return ORJSONResponse(msgspec.structs.asdict(cached_result))
 
     # Dummy processing: Replace with calls to OCR, NLP, and validation services.
     result = {
@@ -110,6 +307,6 @@ async def query_rules(request: QueryRequest):
     }
 
     # Cache the result
-    set_to_cache(key, result)
+    await set_to_cache(key, result)
     logger.info(f"Cached new query result: {request.query}")
     return result
@@ -1,22 +1,128 @@
 import os
-import redis
-import json
+from typing import Any, Dict, List, Optional, Type
+import redis.asyncio as redis
+import msgspec
+from cachetools import TTLCache
 
 # Connect to Redis using environment variables; defaults are provided.
+# A single module-level asyncio client shares its connection pool across
+# requests. Values are kept as raw bytes so they decode straight from msgpack.
 redis_client = redis.Redis(
     host=os.getenv("REDIS_HOST", "redis"),
     port=int(os.getenv("REDIS_PORT", 6379)),
     db=0,
-    decode_responses=True
+    decode_responses=False
 )
 
-def get_from_cache(key: str):
-    """Retrieve a value from Redis and decode the JSON."""
-    value = redis_client.get(key)
+# msgpack entries live under their own namespace so they can coexist with
+# JSON entries written by older deployments.
+#
+# Key convention: the keyspace segment of every key is wrapped in a Redis
+# Cluster hash tag, e.g. "traveller:{query}:<query>" or "pdf:{ocr}:<hash>".
+# Only the tagged part is hashed for slot routing, so all keys of one kind
+# live on the same slot and the multi-key helpers below (MGET, pipelines)
+# can run as a single round-trip even in cluster mode.
+KEY_PREFIX = "mp:"
+
+# In-process cache of encoded payloads in front of Redis, so hot keys are
+# served without a network round-trip. Entries are stored encoded so each
+# hit decodes a fresh object that callers are free to mutate, and the cache
+# is bounded by their total size in bytes since OCR payloads can be large.
+# Access happens only from the event loop thread, between awaits, so no lock
+# is needed.
+local_cache: TTLCache = TTLCache(
+    maxsize=int(os.getenv("LOCAL_CACHE_BYTES", 64 * 1024 * 1024)),
+    ttl=int(os.getenv("LOCAL_CACHE_TTL", 300)),
+    getsizeof=len
+)
+
+# Payloads above this size are only cached in Redis, so one large OCR result
+# can't evict every hot query
+LOCAL_CACHE_MAX_ITEM = local_cache.maxsize // 64
+
+def _cache_locally(key: str, value: bytes):
+    if len(value) <= LOCAL_CACHE_MAX_ITEM:
+        local_cache[key] = value
+
+class CachedOCRResult(msgspec.Struct):
+    """Cached OCR payload for a processed PDF."""
+    text: str
+    metadata: Dict[str, Any]
+    confidence: float
+
+class CachedQueryResult(msgspec.Struct):
+    """Cached answer for a rules query."""
+    answer: str
+    source: str
+    confidence: float
+
+_enc = msgspec.msgpack.Encoder()
+_dec = msgspec.msgpack.Decoder()
+_typed_decoders: Dict[type, msgspec.msgpack.Decoder] = {}
+
+def _decoder_for(result_type: Optional[Type]) -> msgspec.msgpack.Decoder:
+    if result_type is None:
+        return _dec
+    decoder = _typed_decoders.get(result_type)
+    if decoder is None:
+        decoder = _typed_decoders[result_type] = msgspec.msgpack.Decoder(result_type)
+    return decoder
+
+async def get_from_cache(key: str, result_type: Optional[Type] = None):
+    """Retrieve a value from Redis and decode the msgpack payload.
+
+    When ``result_type`` is a ``msgspec.Struct`` the payload is decoded
+    directly into it instead of building an intermediate dict.
+    """
+    key = KEY_PREFIX + key
+    value = local_cache.get(key)
+    if value is None:
+        value = await redis_client.get(key)
+        if value:
+            _cache_locally(key, value)
     if value:
-        return json.loads(value)
+        return _decoder_for(result_type).decode(value)
     return None
 
-def set_to_cache(key: str, value: dict, ttl: int = 604800):
+async def set_to_cache(key: str, value: Any, ttl: int = 604800):
     """Store a value in Redis with a TTL (default 7 days)."""
-    redis_client.setex(key, ttl, json.dumps(value))
+    key = KEY_PREFIX + key
+    value = _enc.encode(value)
+    await redis_client.setex(key, ttl, value)
+    _cache_locally(key, value)
+
+async def get_many_from_cache(keys: List[str], result_type: Optional[Type] = None) -> List[Any]:
+    """
+    Retrieve several values in one MGET round-trip; misses come back as None.
+
+    All keys must share a hash tag so they map to a single cluster slot.
+    """
+    if not keys:
+        return []
+    decoder = _decoder_for(result_type)
+    keys = [KEY_PREFIX + key for key in keys]
+    values = [local_cache.get(key) for key in keys]
+    missing = [i for i, value in enumerate(values) if value is None]
+    if missing:
+        fetched = await redis_client.mget([keys[i] for i in missing])
+        for i, value in zip(missing, fetched):
+            if value:
+                values[i] = value
+                _cache_locally(keys[i], value)
+    return [decoder.decode(value) if value else None for value in values]
+
+async def set_many_to_cache(items: Dict[str, Any], ttl: int = 604800):
+    """
+    Store several values with a TTL using a single pipelined round-trip.
+
+    All keys must share a hash tag so they map to a single cluster slot.
+    """
+    if not items:
+        return
+    encoded = {KEY_PREFIX + key: _enc.encode(value) for key, value in items.items()}
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for key, value in encoded.items():
+            pipe.setex(key, ttl, value)
+        await pipe.execute()
+    for key, value in encoded.items():
+        _cache_locally(key, value)
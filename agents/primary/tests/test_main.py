@@ -0,0 +1,166 @@
+import pytest
+import httpx
+from fakeredis import aioredis
+
+from app import main
+from app.main import app
+from app.utils import cache
+from app.utils.cache import (
+    get_many_from_cache, set_many_to_cache, local_cache, CachedOCRResult
+)
+
+@pytest.fixture
+async def fake_redis(monkeypatch):
+    """Back the cache helpers with an in-memory Redis and an empty local cache"""
+    redis = aioredis.FakeRedis()
+    await redis.flushall()
+    monkeypatch.setattr(cache, 'redis_client', redis)
+    local_cache.clear()
+    yield redis
+    local_cache.clear()
+    await redis.aclose()
+
+@pytest.fixture
+async def client(fake_redis):
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        yield client
+
+def ocr_result(text: str) -> dict:
+    return {'text': text, 'metadata': {'num_pages': 1}, 'confidence': 0.9}
+
+class FakeOCRClient:
+    """Stands in for the OCR service client, capturing each request body"""
+    def __init__(self):
+        self.requests = []
+    
+    async def post(self, url, files=None, content=None, headers=None):
+        if content is not None:
+            content = b"".join([chunk async for chunk in content])
+        self.requests.append({'files': files, 'content': content, 'headers': headers})
+        return httpx.Response(200, json=ocr_result("ocr text"))
+
+async def test_cache_helpers_round_trip(fake_redis):
+    """Batch writes are read back with one MGET; misses come back as None"""
+    await set_many_to_cache({
+        'pdf:ocr:a': ocr_result('first'),
+        'pdf:ocr:b': ocr_result('second'),
+    })
+    local_cache.clear()
+    
+    results = await get_many_from_cache(
+        ['pdf:ocr:a', 'pdf:ocr:missing', 'pdf:ocr:b'],
+        CachedOCRResult
+    )
+    
+    assert [r.text if r else None for r in results] == ['first', None, 'second']
+    assert cache.KEY_PREFIX + 'pdf:ocr:a' in local_cache
+
+async def test_local_cache_skips_large_payloads(fake_redis, monkeypatch):
+    """Payloads above LOCAL_CACHE_MAX_ITEM are kept in Redis only"""
+    monkeypatch.setattr(cache, 'LOCAL_CACHE_MAX_ITEM', 64)
+    await set_many_to_cache({
+        'pdf:ocr:small': ocr_result('small'),
+        'pdf:ocr:large': ocr_result('x' * 100),
+    })
+    
+    assert cache.KEY_PREFIX + 'pdf:ocr:small' in local_cache
+    assert cache.KEY_PREFIX + 'pdf:ocr:large' not in local_cache
+    assert await fake_redis.exists(cache.KEY_PREFIX + 'pdf:ocr:large')
+
+async def test_process_pdfs_uses_cache(client, monkeypatch):
+    """Cached PDFs are answered from the cache; only misses go to OCR"""
+    forwarded = []
+    
+    async def fake_forward_to_ocr(filename, spool, size):
+        forwarded.append(filename)
+        return {**ocr_result(f"ocr {filename}"), 'cached': False}
+    
+    monkeypatch.setattr(main, 'forward_to_ocr', fake_forward_to_ocr)
+    files = [
+        ('files', ('one.pdf', b'%PDF-one', 'application/pdf')),
+        ('files', ('two.pdf', b'%PDF-two', 'application/pdf')),
+    ]
+    first = await client.post("/process-pdfs", files=files)
+    second = await client.post("/process-pdfs", files=files)
+    
+    assert first.status_code == 200
+    assert [r['cached'] for r in first.json()] == [False, False]
+    assert [r['cached'] for r in second.json()] == [True, True]
+    assert [r['text'] for r in second.json()] == ['ocr one.pdf', 'ocr two.pdf']
+    assert forwarded == ['one.pdf', 'two.pdf']
+
+async def test_process_pdfs_reports_failed_files(client, monkeypatch):
+    """One failed file gets an error entry; the others are returned and cached"""
+    async def fake_forward_to_ocr(filename, spool, size):
+        if filename == 'bad.pdf':
+            raise main.HTTPException(status_code=502, detail="OCR service error")
+        return {**ocr_result(f"ocr {filename}"), 'cached': False}
+    
+    monkeypatch.setattr(main, 'forward_to_ocr', fake_forward_to_ocr)
+    files = [
+        ('files', ('bad.pdf', b'%PDF-bad', 'application/pdf')),
+        ('files', ('good.pdf', b'%PDF-good', 'application/pdf')),
+    ]
+    first = await client.post("/process-pdfs", files=files)
+    second = await client.post("/process-pdfs", files=files)
+    
+    assert first.status_code == 200
+    assert [r['error'] for r in first.json()] == ["OCR service error", None]
+    assert first.json()[1]['text'] == 'ocr good.pdf'
+    assert [r['cached'] for r in second.json()] == [False, True]
+
+async def test_process_pdfs_rejects_non_pdf(client):
+    response = await client.post("/process-pdfs", files=[
+        ('files', ('notes.txt', b'text', 'text/plain')),
+    ])
+    assert response.status_code == 400
+
+async def test_forward_small_upload_as_bytes(monkeypatch):
+    """Uploads still in memory are sent as bytes, without touching the disk"""
+    monkeypatch.setattr(app.state, 'http_client', FakeOCRClient(), raising=False)
+    spool = main.tempfile.SpooledTemporaryFile(max_size=main.SPOOL_MAX_SIZE)
+    spool.write(b'%PDF-small')
+    spool.seek(0)
+    
+    await main.forward_to_ocr('small.pdf', spool, 10)
+    
+    [request] = app.state.http_client.requests
+    assert request['files'] == {'file': ('small.pdf', b'%PDF-small', 'application/pdf')}
+    assert request['content'] is None
+
+async def test_forward_large_upload_streams_multipart(monkeypatch):
+    """Spooled-to-disk uploads are streamed as a well-formed multipart body"""
+    monkeypatch.setattr(app.state, 'http_client', FakeOCRClient(), raising=False)
+    monkeypatch.setattr(main, 'SPOOL_MAX_SIZE', 4)
+    monkeypatch.setattr(main, 'UPLOAD_CHUNK_SIZE', 3)
+    data = b'%PDF-' + bytes(range(256)) * 4
+    spool = main.tempfile.TemporaryFile()
+    spool.write(data)
+    spool.seek(0)
+    
+    await main.forward_to_ocr('big "rules".pdf', spool, len(data))
+    
+    [request] = app.state.http_client.requests
+    body = request['content']
+    boundary = request['headers']['Content-Type'].split('boundary=')[1]
+    assert int(request['headers']['Content-Length']) == len(body)
+    assert body.startswith(f'--{boundary}\r\n'.encode())
+    assert b'filename="big %22rules%22.pdf"' in body
+    assert body.endswith(f'\r\n--{boundary}--\r\n'.encode())
+    assert body.split(b'\r\n\r\n', 1)[1][:len(data)] == data
+
+async def test_forward_large_upload_escapes_filename(monkeypatch):
+    """Line breaks in the filename can't break the multipart headers"""
+    monkeypatch.setattr(app.state, 'http_client', FakeOCRClient(), raising=False)
+    monkeypatch.setattr(main, 'SPOOL_MAX_SIZE', 4)
+    data = b'%PDF-large'
+    
+    for filename, quoted in (('a\r\nX-Evil: 1.pdf', b'a%0D%0AX-Evil: 1.pdf'), (None, b'upload.pdf')):
+        spool = main.tempfile.TemporaryFile()
+        spool.write(data)
+        spool.seek(0)
+        await main.forward_to_ocr(filename, spool, len(data))
+        
+        body = app.state.http_client.requests[-1]['content']
+        head = body.split(b'\r\n\r\n', 1)[0]
+        assert head.split(b'\r\n')[1] == b'Content-Disposition: form-data; name="file"; filename="' + quoted + b'"'
@@ -1,6 +1,7 @@
 import os
+import asyncio
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from ..providers.base import BaseProvider
 from ..providers.openai import OpenAIProvider
 
@@ -12,6 +13,7 @@ class BaseAgent:
     def __init__(self):
         self.providers: Dict[str, BaseProvider] = {}
         self.default_provider = os.getenv("PROCESSING_DEFAULT_PROVIDER", "openai")
+        self._default: Optional[BaseProvider] = None
         self.setup_providers()
 
     def setup_providers(self):
@@ -22,25 +24,54 @@ class BaseAgent:
             logger.info("OpenAI provider initialized successfully")
         except Exception as e:
             logger.error(f"Error initializing OpenAI provider: {str(e)}")
+        # Bind the default provider once so the hot path skips the dict lookup
+        self._default = self.providers.get(self.default_provider)
 
-    async def process_chunk(self, file_path: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """Process a chunk using the configured provider"""
-        if not os.path.exists(file_path):
-            raise ValueError(f"File not found: {file_path}")
+    def register_provider(self, name: str, provider: BaseProvider):
+        """Register (or replace) a provider, re-binding the default if needed"""
+        self.providers[name] = provider
+        if name == self.default_provider:
+            self._default = provider
 
-        provider = self.providers.get(self.default_provider)
+    async def process_chunk(
+        self,
+        file_path: str,
+        context: Optional[Dict[str, Any]] = None,
+        page_range: Optional[Dict[str, int]] = None
+    ) -> Dict[str, Any]:
+        """Process a chunk using the configured provider"""
+        provider = self._default
         if not provider:
             raise ValueError(f"Provider not found: {self.default_provider}")
 
         try:
-            result = await provider.process_chunk(file_path, context)
-            if not self.validate_result(result):
+            result = await provider.process_chunk(file_path, context, page_range)
+            if not provider.validate_result(result):
                 raise ValueError("Invalid result from provider")
             return result
+        except FileNotFoundError:
+            # Let the provider's open() detect missing files instead of an extra stat
+            raise ValueError(f"File not found: {file_path}")
         except Exception as e:
             logger.error(f"Error processing chunk: {str(e)}")
             raise
 
+    async def process_chunks(
+        self,
+        items: List[Tuple[str, Optional[Dict[str, Any]], Optional[Dict[str, int]]]]
+    ) -> List[Any]:
+        """
+        Process several chunks concurrently
+
+        Returns one entry per item, in order: either the result dict or the
+        exception raised while processing that chunk.
+        """
+        tasks = [
+            self.process_chunk(file_path, context, page_range)
+            for file_path, context, page_range in items
+        ]
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
     def validate_result(self, result: Dict[str, Any]) -> bool:
         """Validate the processing result"""
         try:
@@ -62,3 +93,11 @@ class BaseAgent:
                 logger.error(f"Error collecting metrics from {name}: {str(e)}")
                 metrics[name] = {"error": str(e)}
         return metrics
+
+    async def close(self):
+        """Release resources held by all providers"""
+        for name, provider in self.providers.items():
+            try:
+                await provider.close()
+            except Exception as e:
+                logger.error(f"Error closing provider {name}: {str(e)}")
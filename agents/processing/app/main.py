@@ -1,20 +1,51 @@
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import Dict, Any, Optional
+from pydantic import BaseModel, Field, field_validator
+from typing import Dict, Any, List, Optional
+from contextlib import asynccontextmanager
 from app.app.agent import BaseAgent
 
-app = FastAPI()
 agent = BaseAgent()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Tie provider HTTP sessions to the application lifecycle
+    yield
+    await agent.close()
+
+app = FastAPI(lifespan=lifespan)
+
+class PageRange(BaseModel):
+    """1-based, inclusive range of pages within a chunk's file"""
+    start: int = Field(..., ge=1)
+    end: int
+
+    @field_validator('end')
+    @classmethod
+    def validate_end(cls, end, info):
+        start = info.data.get('start')
+        if start is not None and end < start:
+            raise ValueError("end must not be before start")
+        return end
+
 class ChunkRequest(BaseModel):
     file_path: str
     context: Optional[Dict[str, Any]] = None
+    page_range: Optional[PageRange] = None
+
+    def page_range_dict(self) -> Optional[Dict[str, int]]:
+        """The page range in the {'start', 'end'} form providers take"""
+        return self.page_range.model_dump() if self.page_range else None
+
+class BatchChunkRequest(BaseModel):
+    chunks: List[ChunkRequest]
 
 @app.post("/process")
 async def process_chunk(request: ChunkRequest):
     """Process a PDF chunk using the configured AI provider"""
     try:
-        result = await agent.process_chunk(request.file_path, request.context)
+        result = await agent.process_chunk(
+            request.file_path, request.context, request.page_range_dict()
+        )
         return {
             "status": "success",
             "result": result
@@ -24,6 +55,25 @@ async def process_chunk(request: ChunkRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/process-batch")
+async def process_batch(request: BatchChunkRequest):
+    """Process several PDF chunks concurrently"""
+    try:
+        results = await agent.process_chunks(
+            [(chunk.file_path, chunk.context, chunk.page_range_dict()) for chunk in request.chunks]
+        )
+        return {
+            "status": "success",
+            "results": [
+                {"status": "error", "error": str(result)}
+                if isinstance(result, Exception)
+                else {"status": "success", "result": result}
+                for result in results
+            ]
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/health")
 async def health_check():
     """Check if the service and its providers are healthy"""
@@ -5,13 +5,20 @@ class BaseProvider(ABC):
     """Base class for AI providers"""
     
     @abstractmethod
-    async def process_chunk(self, file_path: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    async def process_chunk(
+        self,
+        file_path: str,
+        context: Optional[Dict[str, Any]] = None,
+        page_range: Optional[Dict[str, int]] = None
+    ) -> Dict[str, Any]:
         """
         Process a PDF chunk and return the results
         
         Args:
             file_path: Path to the PDF chunk file
             context: Optional context information for processing
+            page_range: Optional 1-based, inclusive {'start', 'end'} pages of
+                file_path to process instead of the whole file
             
         Returns:
             Dict containing:
@@ -44,3 +51,9 @@ class BaseProvider(ABC):
             Dict containing provider-specific metrics
         """
         pass
+
+    async def close(self):
+        """
+        Release any resources held by the provider (e.g. HTTP sessions)
+        """
+        pass
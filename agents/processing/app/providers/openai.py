@@ -1,9 +1,36 @@
 import os
-import base64
+import io
+import mmap
+import asyncio
+import pybase64
+from array import array
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, Any, Optional
+import aiofiles
 import aiohttp
+import orjson
+from pypdf import PdfReader, PdfWriter
 from .base import BaseProvider
 
+# Slots in OpenAIProvider._counters
+_REQUESTS, _SUCCESSES, _TOKENS = range(3)
+
+# PDF read size; a multiple of 3 so base64-encoded slices concatenate cleanly
+_READ_CHUNK_SIZE = 3 << 18
+
+def _extract_pages(file_path: str, start_page: int, end_page: int) -> bytes:
+    """Build an in-memory PDF of pages start_page..end_page (1-based, inclusive)"""
+    # Read the source through a read-only mmap: its objects are scattered
+    # across the file, and page-cache hits then cost a memcpy, not a read()
+    # syscall. append() shares the pages' resources instead of copying page
+    # by page.
+    with open(file_path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as source:
+        writer = PdfWriter()
+        writer.append(PdfReader(source), pages=(start_page - 1, end_page))
+        buf = io.BytesIO()
+        writer.write(buf)
+    return buf.getvalue()
+
 class OpenAIProvider(BaseProvider):
     def __init__(self):
         super().__init__()
@@ -12,20 +39,77 @@ class OpenAIProvider(BaseProvider):
         self.model = os.getenv("PROCESSING_DEFAULT_MODEL", "gpt-4-mini")
         self.max_tokens = 1024  # More budget-friendly for mini model
         self.temperature = 0.3  # Slightly higher for better generalization
-        self.total_tokens_used = 0
-        self.total_requests = 0
-        self.successful_requests = 0
+        self.min_confidence = float(os.getenv("CONFIDENCE_THRESHOLD", "0.6"))
+        # Request, success and token counters kept together so they can be
+        # updated and snapshotted as a unit
+        self._counters = array('Q', [0, 0, 0])
+        self._session: Optional[aiohttp.ClientSession] = None
+        # pypdf is pure Python, so page extraction for concurrent chunks runs
+        # in worker processes rather than contending for the GIL in threads
+        self._extract_pool: Optional[ProcessPoolExecutor] = None
         
         if not self.api_key:
             raise ValueError("OPENAI_PROCESSING_KEY environment variable is required")
 
-    async def process_chunk(self, file_path: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    @property
+    def total_requests(self) -> int:
+        return self._counters[_REQUESTS]
+
+    @property
+    def successful_requests(self) -> int:
+        return self._counters[_SUCCESSES]
+
+    @property
+    def total_tokens_used(self) -> int:
+        return self._counters[_TOKENS]
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Lazily create the shared HTTP session so connections are reused"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=100, ttl_dns_cache=300, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    def _get_extract_pool(self) -> ProcessPoolExecutor:
+        """Lazily start the page extraction worker processes"""
+        if self._extract_pool is None:
+            self._extract_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+        return self._extract_pool
+
+    async def close(self):
+        """Close the shared HTTP session and extraction workers"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        if self._extract_pool is not None:
+            # Joining the workers blocks, so wait for them off the event loop
+            await asyncio.to_thread(self._extract_pool.shutdown, cancel_futures=True)
+            self._extract_pool = None
+
+    async def process_chunk(
+        self,
+        file_path: str,
+        context: Optional[Dict[str, Any]] = None,
+        page_range: Optional[Dict[str, int]] = None
+    ) -> Dict[str, Any]:
         """Process a PDF chunk using OpenAI's vision model with budget constraints"""
+        requests = successes = tokens = 0
         try:
-            # Read and encode the PDF file
-            with open(file_path, "rb") as file:
-                pdf_data = file.read()
-                base64_pdf = base64.b64encode(pdf_data).decode('utf-8')
+            # Read and encode the PDF file without blocking the event loop,
+            # building the data URL as bytes so it is only decoded to str once
+            data_url = bytearray(b"data:application/pdf;base64,")
+            if page_range:
+                # Pull just this chunk's pages out of the shared source PDF
+                pdf = await asyncio.get_running_loop().run_in_executor(
+                    self._get_extract_pool(),
+                    _extract_pages, file_path, page_range['start'], page_range['end']
+                )
+                data_url += pybase64.b64encode(pdf)
+            else:
+                async with aiofiles.open(file_path, "rb") as file:
+                    while chunk := await file.read(_READ_CHUNK_SIZE):
+                        data_url += pybase64.b64encode(chunk)
+            data_url = data_url.decode('ascii')
 
             # Prepare the API request
             headers = {
@@ -54,7 +138,7 @@ class OpenAIProvider(BaseProvider):
                         {
                             "type": "image",
                             "image_url": {
-                                "url": f"data:application/pdf;base64,{base64_pdf}",
+                                "url": data_url,
                                 "detail": "auto"  # Mini model handles detail level differently
                             }
                         }
@@ -66,38 +150,46 @@ class OpenAIProvider(BaseProvider):
             if context:
                 messages[0]["content"] += f"\nContext: {context}"
 
-            self.total_requests += 1
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    "https://api.openai.com/v1/chat/completions",
-                    headers=headers,
-                    json={
-                        "model": self.model,
-                        "messages": messages,
-                        "max_tokens": self.max_tokens,
-                        "temperature": self.temperature,
-                    }
-                ) as response:
-                    if response.status != 200:
-                        error_data = await response.text()
-                        raise Exception(f"OpenAI API error: {error_data}")
-                    
-                    result = await response.json()
-                    self.successful_requests += 1
-                    
-                    # Update token usage
-                    if "usage" in result:
-                        self.total_tokens_used += result["usage"].get("total_tokens", 0)
-                    
-                    return {
-                        "content": result["choices"][0]["message"]["content"],
-                        "model": self.model,
-                        "usage": result.get("usage", {}),
-                        "confidence": self._calculate_confidence(result)
-                    }
+            requests = 1
+            session = await self._get_session()
+            async with session.post(
+                "https://api.openai.com/v1/chat/completions",
+                headers=headers,
+                data=orjson.dumps({
+                    "model": self.model,
+                    "messages": messages,
+                    "max_tokens": self.max_tokens,
+                    "temperature": self.temperature,
+                })
+            ) as response:
+                if response.status != 200:
+                    error_data = await response.text()
+                    raise Exception(f"OpenAI API error: {error_data}")
+                
+                result = orjson.loads(await response.read())
+                successes = 1
+                
+                # Track token usage
+                if "usage" in result:
+                    tokens = result["usage"].get("total_tokens", 0)
+                
+                return {
+                    "content": result["choices"][0]["message"]["content"],
+                    "model": self.model,
+                    "usage": result.get("usage", {}),
+                    "confidence": self._calculate_confidence(result)
+                }
 
+        except FileNotFoundError:
+            raise
         except Exception as e:
             raise Exception(f"Error processing chunk with OpenAI: {str(e)}")
+        finally:
+            # Publish the counter updates together, with no await in between
+            counters = self._counters
+            counters[_REQUESTS] += requests
+            counters[_SUCCESSES] += successes
+            counters[_TOKENS] += tokens
 
     def validate_result(self, result: Dict[str, Any]) -> bool:
         """Validate the processing result"""
@@ -111,8 +203,7 @@ class OpenAIProvider(BaseProvider):
                 return False
             
             # Check confidence meets minimum threshold
-            min_confidence = float(os.getenv("CONFIDENCE_THRESHOLD", "0.6"))
-            if result["confidence"] < min_confidence:
+            if result["confidence"] < self.min_confidence:
                 return False
             
             return True
@@ -122,14 +213,15 @@ class OpenAIProvider(BaseProvider):
 
     def get_metrics(self) -> Dict[str, Any]:
         """Get provider metrics"""
+        total_requests, successful_requests, total_tokens_used = self._counters.tolist()
         return {
             "provider": "openai",
             "model": self.model,
-            "total_requests": self.total_requests,
-            "successful_requests": self.successful_requests,
-            "success_rate": (self.successful_requests / self.total_requests * 100) if self.total_requests > 0 else 0,
-            "total_tokens_used": self.total_tokens_used,
-            "estimated_cost": self._calculate_cost()
+            "total_requests": total_requests,
+            "successful_requests": successful_requests,
+            "success_rate": (successful_requests / total_requests * 100) if total_requests > 0 else 0,
+            "total_tokens_used": total_tokens_used,
+            "estimated_cost": self._calculate_cost(total_tokens_used)
         }
 
     def _calculate_confidence(self, result: Dict[str, Any]) -> float:
@@ -155,8 +247,8 @@ class OpenAIProvider(BaseProvider):
         except Exception:
             return 0.5  # Default confidence if calculation fails
 
-    def _calculate_cost(self) -> float:
+    def _calculate_cost(self, total_tokens_used: int) -> float:
         """Calculate estimated cost based on token usage"""
         # GPT-4 Mini pricing
         cost_per_token = 0.005 / 1000  # $0.005 per 1K tokens (example rate)
-        return (self.total_tokens_used * cost_per_token)
+        return (total_tokens_used * cost_per_token)
@@ -0,0 +1,100 @@
+import pytest
+import io
+from typing import Any, Dict, Optional
+from fastapi.testclient import TestClient
+from pypdf import PdfReader, PdfWriter
+
+from app.main import app, agent
+from app.providers.base import BaseProvider
+from app.providers.openai import _extract_pages
+
+client = TestClient(app)
+
+class StubProvider(BaseProvider):
+    """Records chunk requests instead of calling a model; fails for 'bad.pdf'"""
+    def __init__(self):
+        self.calls = []
+        self.model = "stub"
+        self.max_tokens = 0
+
+    async def process_chunk(
+        self,
+        file_path: str,
+        context: Optional[Dict[str, Any]] = None,
+        page_range: Optional[Dict[str, int]] = None
+    ) -> Dict[str, Any]:
+        self.calls.append((file_path, page_range))
+        if file_path == "bad.pdf":
+            raise RuntimeError("model error")
+        return {"content": file_path, "model": self.model, "confidence": 1.0}
+
+    def validate_result(self, result: Dict[str, Any]) -> bool:
+        return True
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {"calls": len(self.calls)}
+
+@pytest.fixture
+def provider(monkeypatch):
+    """Install a stub as the agent's default provider for one test"""
+    monkeypatch.setattr(agent, 'providers', {})
+    monkeypatch.setattr(agent, '_default', None)
+    provider = StubProvider()
+    agent.register_provider(agent.default_provider, provider)
+    return provider
+
+@pytest.fixture
+def test_pdf(tmp_path):
+    """A five-page PDF whose page widths (101-105) identify each page"""
+    writer = PdfWriter()
+    for width in range(101, 106):
+        writer.add_blank_page(width=width, height=100)
+    path = tmp_path / "test.pdf"
+    with open(path, "wb") as f:
+        writer.write(f)
+    return str(path)
+
+def test_extract_pages(test_pdf):
+    """Only the requested 1-based, inclusive range is copied"""
+    reader = PdfReader(io.BytesIO(_extract_pages(test_pdf, 2, 4)))
+    assert [int(page.mediabox.width) for page in reader.pages] == [102, 103, 104]
+
+def test_extract_pages_missing_file():
+    """A missing source raises FileNotFoundError for the agent to report"""
+    with pytest.raises(FileNotFoundError):
+        _extract_pages("/nonexistent.pdf", 1, 1)
+
+def test_process_passes_page_range(provider):
+    """/process hands the page range through to the provider"""
+    response = client.post("/process", json={
+        "file_path": "rules.pdf",
+        "page_range": {"start": 3, "end": 5}
+    })
+    
+    assert response.status_code == 200
+    assert response.json()["result"]["content"] == "rules.pdf"
+    assert provider.calls == [("rules.pdf", {"start": 3, "end": 5})]
+
+@pytest.mark.parametrize("page_range", [{"start": 3}, {"start": 0, "end": 2}, {"start": 5, "end": 3}])
+def test_process_rejects_invalid_page_range(provider, page_range):
+    """Incomplete or out-of-order page ranges are rejected before processing"""
+    response = client.post("/process", json={"file_path": "rules.pdf", "page_range": page_range})
+    
+    assert response.status_code == 422
+    assert provider.calls == []
+
+def test_process_batch(provider):
+    """Batch results keep request order and report per-chunk failures"""
+    response = client.post("/process-batch", json={"chunks": [
+        {"file_path": "a.pdf", "page_range": {"start": 1, "end": 2}},
+        {"file_path": "bad.pdf"},
+        {"file_path": "c.pdf"},
+    ]})
+    
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["status"] for r in results] == ["success", "error", "success"]
+    assert results[0]["result"]["content"] == "a.pdf"
+    assert "model error" in results[1]["error"]
+    assert results[2]["result"]["content"] == "c.pdf"
+    assert ("a.pdf", {"start": 1, "end": 2}) in provider.calls
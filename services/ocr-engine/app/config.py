@@ -2,6 +2,8 @@ import multiprocessing
 import os
 import time
 from asyncio import Queue
+from collections import OrderedDict
+from tesserocr import OEM, PSM
 
 # Service Info
 VERSION = "1.0.0"
@@ -15,15 +17,28 @@ Features:
 """
 
 # Processing Configuration
-MAX_WORKERS = min(32, (multiprocessing.cpu_count() or 4) + 4)  # CPU cores + 4 for I/O
+CPU_COUNT = multiprocessing.cpu_count() or 4
+MAX_WORKERS = min(32, CPU_COUNT + 4)  # CPU cores + 4 for I/O
+# The render and OCR pools run side by side, so they split the cores rather
+# than each taking all of them; rendering is cheap next to Tesseract
+RENDER_WORKERS = max(1, CPU_COUNT // 4)  # Processes for CPU-bound page rendering
+RENDER_PAGES_PER_TASK = 4  # Pages per render task; bounds rendered pages held in memory
+OCR_WORKERS = max(1, CPU_COUNT - RENDER_WORKERS)  # Processes for CPU-bound OCR
 MAX_BATCH_SIZE = 10
 MAX_QUEUE_SIZE = 100
 MAX_RETRIES = 3
 INITIAL_RETRY_DELAY = 1  # seconds
 DEFAULT_DPI = 400  # Higher DPI for better OCR accuracy
+# Tesseract's runtime grows with pixel count but accuracy stops improving
+# well below 400 DPI, so wide pages are rendered no wider than this
+MAX_OCR_WIDTH = int(os.getenv('MAX_OCR_WIDTH', '2200'))
+OCR_CACHE_SIZE = 256  # Page OCR results kept for repeated pages
 
 # OCR Configuration
-TESSERACT_CONFIG = '--oem 1 --psm 3'  # Fast LSTM mode
+TESSERACT_LANG = 'eng'
+TESSERACT_OEM = OEM.LSTM_ONLY  # Fast LSTM mode
+TESSERACT_PSM = PSM.AUTO  # Fully automatic page segmentation
+TESSDATA_PATH = os.getenv('TESSDATA_PREFIX')  # None uses tesserocr's default
 
 # File System
 TEMP_DIR = os.getenv('TMPDIR', '/tmp/ocr-work')
@@ -51,7 +66,9 @@ except Exception as e:
 
 # Global State
 processing_queue = Queue(maxsize=MAX_QUEUE_SIZE)
-job_progress = {}
+job_progress = OrderedDict()  # Oldest jobs are evicted beyond MAX_TRACKED_JOBS
+MAX_TRACKED_JOBS = 1024
+PROGRESS_STREAM_TIMEOUT = 15.0  # seconds between progress stream re-checks without updates
 start_time = time.time()
 
 # Logging Format
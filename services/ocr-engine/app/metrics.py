@@ -54,6 +54,24 @@ TOTAL_PROGRESS_PERCENT = Gauge(
     ['job_id']
 )
 
+# Bound per-job progress gauges; release_progress_gauge drops finished jobs
+_progress_gauges = {}
+
+def progress_gauge_for(job_id: str):
+    """Return the progress gauge child for a job, binding it once"""
+    gauge = _progress_gauges.get(job_id)
+    if gauge is None:
+        gauge = _progress_gauges[job_id] = TOTAL_PROGRESS_PERCENT.labels(job_id=job_id)
+    return gauge
+
+def release_progress_gauge(job_id: str):
+    """Drop a finished job's progress gauge and its exported series"""
+    _progress_gauges.pop(job_id, None)
+    try:
+        TOTAL_PROGRESS_PERCENT.remove(job_id)
+    except KeyError:
+        pass
+
 # Existing counters for tracking total operations
 TOTAL_PDFS_PROCESSED = Counter(
     'ocr_pdfs_processed_total',
@@ -1,7 +1,11 @@
 from pydantic import BaseModel, Field, field_validator
-from typing import Dict, Any, List, Optional, Annotated
+import re
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 
+# Batch URLs must be plain http(s) links to a .pdf file
+_PDF_URL = re.compile(r'\Ahttps?://[^\s]+\.pdf\Z')
+
 class OCRResponse(BaseModel):
     text: str
     metadata: Dict[str, Any]
@@ -9,13 +13,16 @@ class OCRResponse(BaseModel):
     processing_time: Optional[float] = None
 
 class BatchOCRRequest(BaseModel):
-    urls: List[Annotated[str, Field(pattern=r'^https?://.+\.pdf$')]] = Field(..., max_items=10)
+    urls: List[str] = Field(..., max_items=10)
     
     @field_validator('urls')
     @classmethod
     def validate_urls(cls, urls):
         if not urls:
             raise ValueError("At least one URL must be provided")
+        for url in urls:
+            if not _PDF_URL.match(url):
+                raise ValueError(f"Invalid PDF URL: {url}")
         return urls
 
 class HealthCheckResponse(BaseModel):
@@ -1,130 +1,195 @@
+import io
 import logging
-import tempfile
 import asyncio
+import threading
+from collections import OrderedDict
+import numpy as np
+import xxhash
 from PIL import Image
-import pytesseract
-from typing import Dict, List, Optional, Callable
-from concurrent.futures import ThreadPoolExecutor
+from tesserocr import PyTessBaseAPI
+from typing import AsyncGenerator, Dict, List, Optional, Callable, Tuple
+from concurrent.futures import ProcessPoolExecutor
 from . import config
+from . import metrics
 
 
 logger = logging.getLogger(__name__)
 
-class OCRProcessor:
-    def __init__(self, thread_pool: ThreadPoolExecutor):
-        self.thread_pool = thread_pool
+# One Tesseract instance per worker; the API object is not thread-safe
+_thread_state = threading.local()
 
-    def process_page(self, image: Image.Image, page_id: str, page_num: int) -> Dict:
-        """Process a single page with OCR"""
-        try:
-            # Process image directly in memory
-            with tempfile.NamedTemporaryFile(suffix='.png', delete=True) as temp_img:
-                image.save(temp_img, format='PNG')
-                temp_img.seek(0)
-                
-                # Extract text using optimized Tesseract settings
-                text = pytesseract.image_to_string(
-                    temp_img.name, 
-                    config=config.TESSERACT_CONFIG
-                )
-                
-                # Get confidence score
-                data = pytesseract.image_to_data(
-                    temp_img.name, 
-                    output_type=pytesseract.Output.DICT,
-                    config=config.TESSERACT_CONFIG
-                )
-                
-            # Calculate confidence only for valid scores
-            valid_scores = [float(conf) for conf in data['conf'] if conf != '-1']
-            if valid_scores:
-                # Filter out invalid scores and normalize to 0-100 range
-                valid_scores = [min(max(score, 0), 100) for score in valid_scores]
-                # Only consider scores above a minimum threshold
-                valid_scores = [score for score in valid_scores if score > 10]
-                # Calculate average confidence for the page
-                page_confidence = sum(valid_scores) / len(valid_scores) if valid_scores else 0
-                # Scale down confidence to be more realistic (0-100 range)
-                page_confidence = min(page_confidence * 0.01, 100)
-            else:
-                page_confidence = 0
-            
-            logger.info(f"Processed page {page_num + 1} (Confidence: {page_confidence:.1f}%)")
-            
-            return {
-                'text': text,
-                'confidence': page_confidence,
-                'page': page_num + 1
-            }
-        except Exception as e:
-            logger.error(f"Error processing page {page_num}: {str(e)}")
-            return {
-                'text': '',
-                'confidence': 0,
-                'page': page_num + 1,
-                'error': str(e)
-            }
-
-    async def process_batch(
-        self, 
-        images: List[Image.Image], 
-        batch_start: int, 
-        batch_size: int,
-        on_progress = None
-    ) -> List[Dict]:
-        """Process a batch of pages in parallel"""
-        tasks = []
-        loop = asyncio.get_event_loop()
-        
-        for i in range(batch_start, min(batch_start + batch_size, len(images))):
-            task = loop.run_in_executor(
-                self.thread_pool,
-                self.process_page,
-                images[i],
-                f"page_{i}",
-                i
-            )
-            tasks.append(task)
+def get_tesseract_api() -> PyTessBaseAPI:
+    """Return the calling worker's Tesseract API, initializing it on first use"""
+    api = getattr(_thread_state, 'api', None)
+    if api is None:
+        kwargs = {
+            'lang': config.TESSERACT_LANG,
+            'oem': config.TESSERACT_OEM,
+            'psm': config.TESSERACT_PSM,
+        }
+        if config.TESSDATA_PATH:
+            kwargs['path'] = config.TESSDATA_PATH
+        api = _thread_state.api = PyTessBaseAPI(**kwargs)
+        logger.info(f"Initialized Tesseract API for thread {threading.current_thread().name}")
+    return api
+
+# Page pixels as sent to OCR worker processes: (mode, (width, height), raw bytes)
+PageData = Tuple[str, Tuple[int, int], bytes]
+
+def process_page(page: PageData, page_num: int) -> Dict:
+    """
+    Process a single page with OCR.
+
+    Runs in an OCR worker process, so it must stay a picklable module-level
+    function; the page arrives as raw pixels rather than a PIL image.
+    """
+    try:
+        mode, size, data = page
+        image = Image.frombuffer(mode, size, data, 'raw', mode, 0, 1)
+
+        # Use this worker's persistent Tesseract instance: no subprocess,
+        # no temp file and no per-page model reload
+        api = get_tesseract_api()
         
-        batch_results = await asyncio.gather(*tasks)
+        api.SetImage(image)
+        text = api.GetUTF8Text()
+        confidences = api.AllWordConfidences()
+        api.Clear()
+
+        # Average the word confidences above a minimum threshold, clamped
+        # to 0-100, then scale down to be more realistic
+        conf = np.asarray(confidences, dtype=np.float32)
+        valid = conf[(conf != -1) & (conf > 10)]
+        page_confidence = float(np.clip(valid, 0, 100).mean()) * 0.01 if valid.size else 0.0
         
-        if on_progress:
-            await on_progress(len(batch_results))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Processed page %d (Confidence: %.1f%%)", page_num + 1, page_confidence)
         
-        return batch_results
+        return {
+            'text': text,
+            'confidence': page_confidence,
+            'page': page_num + 1
+        }
+    except Exception as e:
+        logger.error(f"Error processing page {page_num}: {str(e)}")
+        return {
+            'text': '',
+            'confidence': 0,
+            'page': page_num + 1,
+            'error': str(e)
+        }
+
+def _page_bytes(image: Image.Image) -> Tuple[bytes, bytes]:
+    """Return a page's raw pixels and their digest for the page cache"""
+    data = image.tobytes()
+    return data, xxhash.xxh3_128_digest(data)
+
+class OCRProcessor:
+    def __init__(self, ocr_pool: Optional[ProcessPoolExecutor] = None):
+        self.ocr_pool = ocr_pool
+        # LRU of OCR results keyed by page size and pixel hash, so repeated
+        # pages (blank separators, boilerplate) are only recognized once
+        self._page_cache: OrderedDict = OrderedDict()
+
+    def _cache_get(self, key: Tuple) -> Optional[Dict]:
+        result = self._page_cache.get(key)
+        if result is None:
+            metrics.CACHE_MISSES.inc()
+            return None
+        self._page_cache.move_to_end(key)
+        metrics.CACHE_HITS.inc()
+        return result
+
+    def _cache_put(self, key: Tuple, result: Dict):
+        if 'error' in result:
+            return
+        self._page_cache[key] = result
+        self._page_cache.move_to_end(key)
+        if len(self._page_cache) > config.OCR_CACHE_SIZE:
+            self._page_cache.popitem(last=False)
 
     async def process_document(
         self, 
-        images: List[Image.Image],
+        pages: AsyncGenerator[Image.Image, None],
         on_progress = None
     ) -> List[Dict]:
-        """Process all pages in a document using batched execution"""
-        results = []
-        batch_size = config.MAX_WORKERS * 2  # Process multiple batches for better throughput
+        """
+        OCR pages as they are produced, keeping every OCR worker busy.
+
+        At most a small window of pages is handed to the pool at a time and
+        each image is closed once its pixels have been submitted, so only
+        that window is held in memory rather than the whole document.
+        Pages already seen, in this or an earlier document, reuse the
+        earlier result instead of being sent to the pool.
+        """
+        loop = asyncio.get_running_loop()
+        window = asyncio.Semaphore(config.OCR_WORKERS * 2)
+        inflight: Dict[Tuple, asyncio.Future] = {}
         
-        for i in range(0, len(images), batch_size):
-            batch_results = await self.process_batch(
-                images, 
-                batch_start=i, 
-                batch_size=batch_size,
-                on_progress=on_progress
-            )
-            results.extend(batch_results)
+        async def run_page(key: Tuple, page: PageData, page_num: int) -> Dict:
+            try:
+                result = await loop.run_in_executor(self.ocr_pool, process_page, page, page_num)
+                self._cache_put(key, result)
+                return result
+            finally:
+                window.release()
+                if on_progress:
+                    await on_progress(1)
         
-        # Sort results by page number
-        results.sort(key=lambda x: x['page'])
+        async def reuse_page(source: asyncio.Future, page_num: int) -> Dict:
+            result = await source
+            if on_progress:
+                await on_progress(1)
+            return {**result, 'page': page_num + 1}
+        
+        tasks = []
+        try:
+            async for image in pages:
+                page_num = len(tasks)
+                # Copying and hashing a page's pixels takes milliseconds; do
+                # it off the event loop so other requests keep being served
+                data, digest = await asyncio.to_thread(_page_bytes, image)
+                key = (image.mode, image.size, digest)
+                image.close()
+                
+                cached = self._cache_get(key)
+                if cached is not None:
+                    source = loop.create_future()
+                    source.set_result(cached)
+                    tasks.append(asyncio.ensure_future(reuse_page(source, page_num)))
+                elif key in inflight:
+                    tasks.append(asyncio.ensure_future(reuse_page(inflight[key], page_num)))
+                else:
+                    await window.acquire()
+                    task = asyncio.ensure_future(run_page(key, (image.mode, image.size, data), page_num))
+                    inflight[key] = task
+                    tasks.append(task)
+                del data
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        finally:
+            # Stop rendering and release its shared memory if we bailed out early
+            await pages.aclose()
+        
+        # Tasks were created in page order and gather preserves that order
+        results = await asyncio.gather(*tasks)
+        metrics.CACHE_SIZE.set(len(self._page_cache))
+        logger.info("OCR completed for %d pages", len(results))
         return results
 
-    def calculate_confidence(self, results: List[Dict]) -> float:
-        """Calculate average confidence across all pages"""
+    def finalize(self, results: List[Dict]) -> Tuple[str, float]:
+        """Combine page text and average confidence in a single pass"""
         if not results:
-            return 0.0
-        # Sum up individual page confidences and divide by number of pages
-        total_confidence = sum(r['confidence'] for r in results)
+            return "", 0.0
+        buf = io.StringIO()
+        total_confidence = 0.0
+        for i, r in enumerate(results):
+            if i:
+                buf.write("\n")
+            buf.write(r['text'])
+            total_confidence += r['confidence']
         avg_confidence = total_confidence / len(results)
         # Scale down the final confidence to be more realistic
-        return min(avg_confidence / 2, 100)
-
-    def combine_text(self, results: List[Dict]) -> str:
-        """Combine text from all pages"""
-        return "\n".join(r['text'] for r in results)
+        return buf.getvalue(), min(avg_confidence / 2, 100)
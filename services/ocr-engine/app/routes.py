@@ -11,7 +11,8 @@ from typing import Optional, Dict, List
 import httpx
 import json
 import uuid
-from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from concurrent.futures import ProcessPoolExecutor
 
 from . import config
 from . import metrics
@@ -24,11 +25,39 @@ from .ocr import OCRProcessor
 
 logger = logging.getLogger(__name__)
 
+def track_job(job_id: str, progress: Dict) -> Dict:
+    """Start tracking a job's progress, evicting the oldest jobs beyond the cap"""
+    progress['updated'] = asyncio.Event()
+    config.job_progress[job_id] = progress
+    while len(config.job_progress) > config.MAX_TRACKED_JOBS:
+        config.job_progress.popitem(last=False)
+    return progress
+
+def notify_progress(progress: Dict):
+    """Wake every progress stream waiting on this job"""
+    progress['last_update'] = datetime.now()
+    progress['updated'].set()
+    progress['updated'] = asyncio.Event()
+
 def create_app() -> FastAPI:
+    ocr_processor = OCRProcessor()
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # Create the OCR process pool. Each worker loads its own Tesseract
+        # model on its first page, so a failed load becomes a page error
+        # instead of breaking the pool for every later request.
+        ocr_processor.ocr_pool = ProcessPoolExecutor(max_workers=config.OCR_WORKERS)
+        try:
+            yield
+        finally:
+            await asyncio.to_thread(ocr_processor.ocr_pool.shutdown, cancel_futures=True)
+
     app = FastAPI(
         title="RPG Rules Engine - OCR Service",
         description=config.DESCRIPTION,
-        version=config.VERSION
+        version=config.VERSION,
+        lifespan=lifespan
     )
 
     # Add CORS middleware
@@ -51,10 +80,6 @@ def create_app() -> FastAPI:
         allowed_hosts=["*"]
     )
 
-    # Create thread pool
-    thread_pool = ThreadPoolExecutor(max_workers=config.MAX_WORKERS)
-    ocr_processor = OCRProcessor(thread_pool)
-
     @app.get("/", tags=["Status"])
     async def read_root():
         """Root endpoint for health checks"""
@@ -67,7 +92,7 @@ def create_app() -> FastAPI:
             status="healthy",
             version=config.VERSION,
             queue_size=config.processing_queue.qsize(),
-            active_workers=len([t for t in thread_pool._threads if t.is_alive()]),
+            active_workers=len([p for p in (ocr_processor.ocr_pool._processes or {}).values() if p.is_alive()]),
             uptime=time.time() - config.start_time,
             last_processed=max([p.get('last_update') for p in config.job_progress.values()], default=None)
         )
@@ -102,57 +127,64 @@ def create_app() -> FastAPI:
             content = await file.read()
             
             # Initialize progress tracking
-            config.job_progress[job_id] = {
+            progress = track_job(job_id, {
                 'total_pages': 0,
                 'processed_pages': 0,
                 'status': 'processing',
                 'start_time': start_process_time,
                 'last_update': datetime.now()
-            }
+            })
             
             # Process PDF
             pdf_processor = PDFProcessor(content, dpi=dpi)
-            images = await pdf_processor.process()
+            pages = await pdf_processor.process()
+            total_pages = pdf_processor.page_count
             
             # Update progress tracking
-            config.job_progress[job_id]['total_pages'] = len(images)
+            progress['total_pages'] = total_pages
+            notify_progress(progress)
             
             # Define progress callback
             async def update_progress(processed_count: int):
-                config.job_progress[job_id]['processed_pages'] += processed_count
-                config.job_progress[job_id]['last_update'] = datetime.now()
+                progress['processed_pages'] += processed_count
                 
                 # Calculate estimated time remaining
                 elapsed_time = time.time() - start_process_time
-                if config.job_progress[job_id]['processed_pages'] > 0:
-                    avg_time_per_page = elapsed_time / config.job_progress[job_id]['processed_pages']
-                    remaining_pages = len(images) - config.job_progress[job_id]['processed_pages']
-                    config.job_progress[job_id]['estimated_time_remaining'] = avg_time_per_page * remaining_pages
+                if progress['processed_pages'] > 0:
+                    avg_time_per_page = elapsed_time / progress['processed_pages']
+                    remaining_pages = total_pages - progress['processed_pages']
+                    progress['estimated_time_remaining'] = avg_time_per_page * remaining_pages
+                    metrics.progress_gauge_for(job_id).set(
+                        progress['processed_pages'] / total_pages * 100
+                    )
+                notify_progress(progress)
             
-            # Process images with OCR
-            results = await ocr_processor.process_document(images, on_progress=update_progress)
+            # OCR pages as they are rendered
+            results = await ocr_processor.process_document(pages, on_progress=update_progress)
+            text, confidence = ocr_processor.finalize(results)
             
             # Calculate processing time
             processing_time = time.time() - start_process_time
             
             # Update progress
-            config.job_progress[job_id]['status'] = 'completed'
-            config.job_progress[job_id]['last_update'] = datetime.now()
+            progress['status'] = 'completed'
+            notify_progress(progress)
+            metrics.release_progress_gauge(job_id)
             
             # Prepare response
             response = OCRResponse(
-                text=ocr_processor.combine_text(results),
+                text=text,
                 metadata={
-                    "num_pages": len(images),
+                    "num_pages": len(results),
                     "filename": file.filename,
                     "content_type": file.content_type,
                     "parallel_processed": True,
                     "processing_time_seconds": processing_time,
                     "job_id": job_id,
                     "dpi": dpi,
-                    "workers": config.MAX_WORKERS
+                    "workers": config.OCR_WORKERS
                 },
-                confidence=ocr_processor.calculate_confidence(results),
+                confidence=confidence,
                 processing_time=processing_time
             )
             
@@ -165,6 +197,11 @@ def create_app() -> FastAPI:
             )
             
         except Exception as e:
+            metrics.release_progress_gauge(job_id)
+            # Let progress streams finish instead of waiting on a dead job
+            if job_id in config.job_progress:
+                config.job_progress[job_id]['status'] = 'failed'
+                notify_progress(config.job_progress[job_id])
             logger.error(f"Error processing file {file.filename}: {str(e)}", exc_info=True)
             raise HTTPException(status_code=500, detail=str(e))
 
@@ -192,38 +229,48 @@ def create_app() -> FastAPI:
         
         async def event_generator():
             last_percent = -1
+            progress = None
             try:
                 while True:
-                    if job_id in config.job_progress:
-                        progress = config.job_progress[job_id]
-                        total_pages = progress['total_pages']
-                        processed_pages = progress['processed_pages']
-                        percent = int((processed_pages / total_pages * 100) if total_pages > 0 else 0)
+                    progress = config.job_progress.get(job_id)
+                    if progress is None:
+                        break
+                    # Grab the current event before reading, so an update made
+                    # while we emit still wakes the next wait
+                    updated = progress['updated']
+                    total_pages = progress['total_pages']
+                    processed_pages = progress['processed_pages']
+                    percent = int((processed_pages / total_pages * 100) if total_pages > 0 else 0)
+                    finished = progress['status'] in ('completed', 'failed')
+                    
+                    if percent != last_percent or finished:
+                        last_percent = percent
+                        data = {
+                            "percent": percent,
+                            "status": progress['status'],
+                            "processed": processed_pages,
+                            "total": total_pages,
+                            "estimated_time": progress.get('estimated_time_remaining')
+                        }
+                        yield f"event: progress\ndata: {json.dumps(data)}\n\n"
                         
-                        if percent != last_percent or progress['status'] == 'completed':
-                            last_percent = percent
-                            data = {
-                                "percent": percent,
-                                "status": progress['status'],
-                                "processed": processed_pages,
-                                "total": total_pages,
-                                "estimated_time": progress.get('estimated_time_remaining')
-                            }
-                            yield f"event: progress\ndata: {json.dumps(data)}\n\n"
-                            
-                            if progress['status'] == 'completed':
-                                await asyncio.sleep(0.1)
-                                break
+                        if finished:
+                            break
                     
-                    await asyncio.sleep(0.2)
+                    # Sleep until the job reports progress; the timeout only
+                    # guards against a job evicted from tracking mid-stream
+                    try:
+                        await asyncio.wait_for(updated.wait(), timeout=config.PROGRESS_STREAM_TIMEOUT)
+                    except asyncio.TimeoutError:
+                        pass
                     
             except Exception as e:
                 logger.error(f"Error in progress stream: {e}")
                 error_data = {"error": str(e), "status": "error"}
                 yield f"event: error\ndata: {json.dumps(error_data)}\n\n"
             finally:
-                if job_id in config.job_progress and progress['status'] == 'completed':
-                    del config.job_progress[job_id]
+                if progress is not None and progress['status'] in ('completed', 'failed'):
+                    config.job_progress.pop(job_id, None)
         
         return StreamingResponse(
             event_generator(),
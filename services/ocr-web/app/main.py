@@ -2,25 +2,34 @@ import os
 import asyncio
 import logging
 import shutil
-from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse, FileResponse
+import tempfile
+from fastapi import FastAPI, Request, UploadFile, File, HTTPException, BackgroundTasks
+from fastapi.responses import ORJSONResponse, FileResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Dict
+from typing import BinaryIO, List, Dict, Optional
 import aiohttp
+import redis.asyncio as redis
 import uuid
-import json
-from PIL import Image
-import PyPDF2
-import tempfile
-from contextlib import contextmanager
+import orjson
+import pikepdf
+from contextlib import asynccontextmanager
 
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="OCR Web Interface")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Share one pooled HTTP session to the processing agent across all chunks
+    await processing_manager.start()
+    try:
+        yield
+    finally:
+        await processing_manager.close()
+
+app = FastAPI(title="OCR Web Interface", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # CORS configuration
 app.add_middleware(
@@ -51,122 +60,140 @@ CHUNK_SIZE = int(os.getenv("PDF_CHUNK_SIZE", "20"))
 CHUNK_OVERLAP = int(os.getenv("PDF_CHUNK_OVERLAP", "2"))
 PROCESSING_AGENT_URL = os.getenv("PROCESSING_AGENT_URL", "http://processing-agent:8000")
 MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", str(50 * 1024 * 1024)))  # 50MB default
+MULTIPART_OVERHEAD = 64 * 1024  # Allowance for form boundaries and headers around the file
 MIN_DISK_SPACE = int(os.getenv("MIN_DISK_SPACE", str(500 * 1024 * 1024)))  # 500MB default
 TEMP_DIR = os.getenv("OCR_TEMP_DIR", "/tmp/pdf-chunks")  # Use mounted volume for temp files
+MAX_CONCURRENT_CHUNKS = int(os.getenv("MAX_CONCURRENT_CHUNKS", "8"))  # Chunks in flight to the processing agent
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))  # Uvicorn worker processes
+# Each worker process gets an equal share, so the total across workers stays
+# within MAX_CONCURRENT_CHUNKS
+WORKER_CONCURRENT_CHUNKS = max(1, MAX_CONCURRENT_CHUNKS // WEB_CONCURRENCY)
+REDIS_HOST = os.getenv("REDIS_HOST", "redis")
+REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+REDIS_PASSWORD = os.getenv("REDIS_PASSWORD") or None
+JOB_TTL = int(os.getenv("JOB_TTL", str(24 * 60 * 60)))  # Keep job state for a day after its last update
 
-@contextmanager
-def temporary_directory():
-    """Create a temporary directory that's automatically cleaned up"""
-    temp_dir = os.path.join(TEMP_DIR, f'ocr_{uuid.uuid4().hex}')
-    os.makedirs(temp_dir, exist_ok=True)
-    try:
-        yield temp_dir
-    finally:
-        try:
-            shutil.rmtree(temp_dir, ignore_errors=True)
-        except Exception as e:
-            logger.error(f"Error cleaning up temporary directory {temp_dir}: {e}")
+STATUS_STREAM_TIMEOUT = 15.0  # seconds between keepalives on an idle status stream
+
+# Redis keys for a job. The job id is a Cluster hash tag, so all of a job's
+# keys share a slot and can be updated in one transaction.
+def job_key(job_id: str) -> str:
+    return f"job:{{{job_id}}}"
+
+def results_key(job_id: str) -> str:
+    return f"job:{{{job_id}}}:results"
+
+def events_key(job_id: str) -> str:
+    return f"job:{{{job_id}}}:events"
+
+def job_status(job: Dict) -> Dict:
+    """Build the client-facing status of a job from its Redis hash"""
+    completed_chunks = int(job['completed_chunks'])
+    total_chunks = int(job['total_chunks'])
+    return {
+        'id': job['id'],
+        'status': job['status'],
+        'file_name': job['file_name'],
+        'progress': {
+            'completed_chunks': completed_chunks,
+            'total_chunks': total_chunks,
+            'percentage': (completed_chunks / total_chunks) * 100
+        },
+        'error': job.get('error')
+    }
 
 def check_disk_space(path: str = TEMP_DIR) -> bool:
     """Check if there's enough disk space available"""
     stats = shutil.disk_usage(path)
     return stats.free >= MIN_DISK_SPACE
 
-def get_file_size(file_path: str) -> int:
-    """Get file size in bytes"""
-    return os.path.getsize(file_path)
+def get_upload_size(src: BinaryIO) -> int:
+    """Get the size of a spooled upload"""
+    size = src.seek(0, os.SEEK_END)
+    src.seek(0)
+    return size
+
+def save_upload(src: BinaryIO, size: int) -> str:
+    """
+    Copy a spooled upload into the shared chunk volume and return its path.
+    
+    The bytes are moved with sendfile, in the kernel, rather than read into
+    Python and written back out; asking for the upload's descriptor moves
+    an in-memory spool to disk first.
+    """
+    fd, temp_path = tempfile.mkstemp(suffix='.pdf', dir=TEMP_DIR)
+    try:
+        with os.fdopen(fd, 'wb') as dst:
+            offset = 0
+            while offset < size:
+                sent = os.sendfile(dst.fileno(), src.fileno(), offset, size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+    except Exception:
+        os.remove(temp_path)
+        raise
+    return temp_path
 
 class PDFChunker:
-    def __init__(self, file_path: str, chunk_size: int, overlap: int, chunk_dir: str):
+    def __init__(self, file_path: str, chunk_size: int, overlap: int):
         self.file_path = file_path
         self.chunk_size = chunk_size
         self.overlap = overlap
-        self.chunk_dir = chunk_dir
         self.total_pages = 0
         self.chunks: List[Dict] = []
 
+    def _make_chunk(self, start_page: int, end_page: int) -> Dict:
+        """Describe pages [start_page, end_page) of the source PDF as a chunk"""
+        return {
+            'id': str(uuid.uuid4()),
+            'start_page': start_page + 1,
+            'end_page': end_page,
+            'total_pages': end_page - start_page,
+            'whole_file': start_page == 0 and end_page == self.total_pages
+        }
+
     async def process(self) -> List[Dict]:
-        """Split PDF into overlapping chunks"""
+        """Split PDF into overlapping chunks without blocking the event loop"""
+        return await asyncio.to_thread(self._process_sync)
+
+    def _process_sync(self) -> List[Dict]:
+        """
+        Split PDF into overlapping chunks.
+        
+        Chunks are page ranges of the uploaded PDF; the processing agent
+        reads its pages straight from the source, so no chunk files are
+        written.
+        """
         try:
-            with open(self.file_path, 'rb') as file:
-                pdf = PyPDF2.PdfReader(file)
+            # Count pages from the page tree qpdf has walked and repaired;
+            # the root /Count entry is unvalidated in damaged PDFs
+            with pikepdf.open(self.file_path) as pdf:
                 self.total_pages = len(pdf.pages)
+            
+            # For small PDFs (less than chunk_size), create a single chunk
+            if self.total_pages <= self.chunk_size:
+                self.chunks.append(self._make_chunk(0, self.total_pages))
+                return self.chunks
+            
+            # For larger PDFs, create overlapping chunks
+            start_page = 0
+            while start_page < self.total_pages:
+                end_page = min(start_page + self.chunk_size, self.total_pages)
                 
-                # For small PDFs (less than chunk_size), create a single chunk
-                if self.total_pages <= self.chunk_size:
-                    chunk_id = str(uuid.uuid4())
-                    chunk_dir = os.path.join(self.chunk_dir, chunk_id)
-                    os.makedirs(chunk_dir, exist_ok=True)
-                    
-                    chunk_path = os.path.join(chunk_dir, 'chunk.pdf')
-                    writer = PyPDF2.PdfWriter()
-                    
-                    for page_num in range(self.total_pages):
-                        writer.add_page(pdf.pages[page_num])
-                    
-                    with open(chunk_path, 'wb') as chunk_file:
-                        writer.write(chunk_file)
-                    
-                    self.chunks.append({
-                        'id': chunk_id,
-                        'path': chunk_path,
-                        'start_page': 1,
-                        'end_page': self.total_pages,
-                        'total_pages': self.total_pages
-                    })
-                    return self.chunks
+                # Skip creating a new chunk if it would be too small
+                if end_page - start_page < 2 and len(self.chunks) > 0:
+                    break
                 
-                # For larger PDFs, create overlapping chunks
-                start_page = 0
-                while start_page < self.total_pages:
-                    # Check disk space before creating chunk
-                    if not check_disk_space():
-                        raise Exception("Insufficient disk space for creating PDF chunk")
-                    
-                    end_page = min(start_page + self.chunk_size, self.total_pages)
-                    
-                    # Skip creating a new chunk if it would be too small
-                    if end_page - start_page < 2 and len(self.chunks) > 0:
-                        break
-                    
-                    # Create chunk directory
-                    chunk_id = str(uuid.uuid4())
-                    chunk_dir = os.path.join(self.chunk_dir, chunk_id)
-                    os.makedirs(chunk_dir, exist_ok=True)
-                    
-                    # Create new PDF for chunk
-                    chunk_path = os.path.join(chunk_dir, 'chunk.pdf')
-                    writer = PyPDF2.PdfWriter()
-                    
-                    # Add pages to chunk
-                    for page_num in range(start_page, end_page):
-                        writer.add_page(pdf.pages[page_num])
-                    
-                    # Save chunk
-                    with open(chunk_path, 'wb') as chunk_file:
-                        writer.write(chunk_file)
-                        
-                    # Verify chunk size
-                    chunk_size = get_file_size(chunk_path)
-                    if chunk_size > MAX_FILE_SIZE:
-                        os.remove(chunk_path)
-                        raise Exception(f"Chunk size {chunk_size/1024/1024:.1f}MB exceeds maximum allowed size")
-                    
-                    self.chunks.append({
-                        'id': chunk_id,
-                        'path': chunk_path,
-                        'start_page': start_page + 1,
-                        'end_page': end_page,
-                        'total_pages': end_page - start_page
-                    })
-                    
-                    # Move start_page for next chunk, including overlap
-                    # Ensure we make meaningful progress
-                    progress = max(1, self.chunk_size - self.overlap)
-                    start_page += progress
-
-                logger.info(f"Split PDF into {len(self.chunks)} chunks")
-                return self.chunks
+                self.chunks.append(self._make_chunk(start_page, end_page))
+                
+                # Move start_page for next chunk, including overlap
+                # Ensure we make meaningful progress
+                progress = max(1, self.chunk_size - self.overlap)
+                start_page += progress
+
+            logger.info(f"Split PDF into {len(self.chunks)} chunks")
+            return self.chunks
                 
         except Exception as e:
             logger.error(f"Error splitting PDF: {str(e)}")
@@ -174,93 +201,190 @@ class PDFChunker:
 
 class ProcessingManager:
     def __init__(self):
-        self.jobs: Dict[str, Dict] = {}
+        # Job state lives in Redis so it survives restarts and is shared by
+        # every ocr-web instance
+        self.redis = redis.Redis(
+            host=REDIS_HOST,
+            port=REDIS_PORT,
+            password=REDIS_PASSWORD,
+            decode_responses=True
+        )
+        self.session: Optional[aiohttp.ClientSession] = None
+        # Bound fan-out across all jobs so a large PDF can't flood the agent
+        self.chunk_slots = asyncio.Semaphore(WORKER_CONCURRENT_CHUNKS)
+
+    async def start(self):
+        """Open the keep-alive connection pool to the processing agent"""
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=100,
+                limit_per_host=32,  # There is only one host: the processing agent
+                ttl_dns_cache=300,
+                keepalive_timeout=60
+            ),
+            json_serialize=lambda obj: orjson.dumps(obj).decode(),
+            # Chunks can take minutes on the model, so only bound connecting,
+            # not the default 5-minute total
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=10)
+        )
+
+    async def close(self):
+        """Close the connection pools"""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+        await self.redis.aclose()
 
     async def create_job(self, file_name: str, chunks: List[Dict]) -> str:
         """Create new processing job"""
         job_id = str(uuid.uuid4())
-        self.jobs[job_id] = {
-            'id': job_id,
-            'file_name': file_name,
-            'status': 'processing',
-            'chunks': chunks,
-            'results': [],
-            'completed_chunks': 0,
-            'total_chunks': len(chunks)
-        }
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(job_key(job_id), mapping={
+                'id': job_id,
+                'file_name': file_name,
+                'status': 'processing',
+                'completed_chunks': 0,
+                'total_chunks': len(chunks)
+            })
+            pipe.expire(job_key(job_id), JOB_TTL)
+            await pipe.execute()
         return job_id
 
-    async def process_chunk(self, job_id: str, chunk: Dict):
+    async def get_job(self, job_id: str) -> Optional[Dict]:
+        """Load a job's state, or None if it doesn't exist or has expired"""
+        job = await self.redis.hgetall(job_key(job_id))
+        if not job:
+            return None
+        job['completed_chunks'] = int(job['completed_chunks'])
+        job['total_chunks'] = int(job['total_chunks'])
+        return job
+
+    async def get_results(self, job_id: str, total_chunks: int) -> List[Optional[Dict]]:
+        """Load a job's chunk results in chunk (page) order"""
+        results: List[Optional[Dict]] = [None] * total_chunks
+        for index, result in (await self.redis.hgetall(results_key(job_id))).items():
+            results[int(index)] = orjson.loads(result)
+        return results
+
+    async def _publish(self, job_id: str, job: Dict):
+        """Push the job's current status to subscribers of its events channel"""
+        await self.redis.publish(events_key(job_id), orjson.dumps(job_status(job)))
+
+    async def _fail_job(self, job_id: str, error: str):
+        """Mark a job as failed and notify subscribers"""
+        await self.redis.hset(job_key(job_id), mapping={'status': 'error', 'error': error})
+        job = await self.get_job(job_id)
+        if job:
+            await self._publish(job_id, job)
+
+    async def run_job(self, job_id: str, file_path: str, chunks: List[Dict]):
+        """Process every chunk of a job, then finalize it exactly once"""
+        await asyncio.gather(
+            *(
+                self.process_chunk(job_id, file_path, index, chunk)
+                for index, chunk in enumerate(chunks)
+            ),
+            return_exceptions=True
+        )
+        await self.finalize_job(job_id, file_path)
+
+    async def process_chunk(self, job_id: str, file_path: str, index: int, chunk: Dict):
+        """Send chunk to processing agent, waiting for a free slot first"""
+        async with self.chunk_slots:
+            await self._process_chunk(job_id, file_path, index, chunk)
+
+    async def _process_chunk(self, job_id: str, file_path: str, index: int, chunk: Dict):
         """Send chunk to processing agent"""
         try:
             # Update path to use shared volume path
-            shared_path = chunk['path'].replace(TEMP_DIR, '/tmp/pdf-chunks')
+            shared_path = file_path.replace(TEMP_DIR, '/tmp/pdf-chunks')
+            
+            # A chunk covering the whole PDF is sent without a page range, so
+            # the agent reads the upload as is instead of rebuilding it
+            page_range = None if chunk['whole_file'] else {
+                'start': chunk['start_page'],
+                'end': chunk['end_page']
+            }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{PROCESSING_AGENT_URL}/process",
-                    json={
-                        'job_id': job_id,
-                        'chunk_id': chunk['id'],
-                        'file_path': shared_path,
-                        'page_range': {
-                            'start': chunk['start_page'],
-                            'end': chunk['end_page']
-                        }
-                    }
-                ) as response:
-                    if response.status != 200:
-                        raise Exception(f"Processing failed: {await response.text()}")
-                    
-                    result = await response.json()
-                    if result['status'] == 'success':
-                        self.jobs[job_id]['results'].append({
+            async with self.session.post(
+                f"{PROCESSING_AGENT_URL}/process",
+                json={
+                    'job_id': job_id,
+                    'chunk_id': chunk['id'],
+                    'file_path': shared_path,
+                    'page_range': page_range
+                }
+            ) as response:
+                if response.status != 200:
+                    raise Exception(f"Processing failed: {await response.text()}")
+                
+                result = await response.json(loads=orjson.loads)
+                if result['status'] == 'success':
+                    # Each chunk owns its slot, so results come back in page order
+                    async with self.redis.pipeline(transaction=True) as pipe:
+                        pipe.hset(results_key(job_id), str(index), orjson.dumps({
                             'result': result['result'],
-                            'page_range': result['page_range']
-                        })
-                        self.jobs[job_id]['completed_chunks'] += 1
-                        
-                        # Check if all chunks are processed
-                        if self.jobs[job_id]['completed_chunks'] == self.jobs[job_id]['total_chunks']:
-                            await self.finalize_job(job_id)
-                    else:
-                        raise Exception(result['message'])
+                            'page_range': {
+                                'start': chunk['start_page'],
+                                'end': chunk['end_page']
+                            }
+                        }))
+                        pipe.expire(results_key(job_id), JOB_TTL)
+                        pipe.hincrby(job_key(job_id), 'completed_chunks', 1)
+                        pipe.hgetall(job_key(job_id))
+                        *_, job = await pipe.execute()
+                    await self._publish(job_id, job)
+                else:
+                    raise Exception(result['message'])
         
         except Exception as e:
             logger.error(f"Error processing chunk: {str(e)}")
-            self.jobs[job_id]['status'] = 'error'
-            self.jobs[job_id]['error'] = str(e)
+            await self._fail_job(job_id, str(e))
 
-    async def finalize_job(self, job_id: str):
-        """Combine results and clean up"""
+    async def finalize_job(self, job_id: str, file_path: str):
+        """Mark the job complete, unless a chunk failed, and clean up"""
         try:
-            job = self.jobs[job_id]
-            
-            # Sort results by page number
-            job['results'].sort(key=lambda x: x['page_range']['start'])
+            job = await self.get_job(job_id)
+            if job is None:
+                return
             
-            # Update status
-            job['status'] = 'completed'
+            # A failed chunk has already marked the job as errored. Either
+            # way, restart the TTL so results are kept for JOB_TTL after
+            # the job finishes, however long it ran
+            async with self.redis.pipeline(transaction=True) as pipe:
+                if job['status'] != 'error':
+                    job['status'] = 'completed'
+                    pipe.hset(job_key(job_id), 'status', 'completed')
+                pipe.expire(job_key(job_id), JOB_TTL)
+                pipe.expire(results_key(job_id), JOB_TTL)
+                await pipe.execute()
+            await self._publish(job_id, job)
             
-            # Clean up chunk files if they still exist
-            for chunk in job['chunks']:
-                try:
-                    if os.path.exists(chunk['path']):
-                        os.remove(chunk['path'])
-                        chunk_dir = os.path.dirname(chunk['path'])
-                        if os.path.exists(chunk_dir) and not os.listdir(chunk_dir):
-                            os.rmdir(chunk_dir)
-                except Exception as e:
-                    logger.debug(f"Chunk {chunk['id']} already cleaned up or error: {str(e)}")
-                    
         except Exception as e:
             logger.error(f"Error finalizing job: {str(e)}")
-            self.jobs[job_id]['status'] = 'error'
-            self.jobs[job_id]['error'] = str(e)
+            await self._fail_job(job_id, str(e))
+        finally:
+            # Every chunk has been read, so the uploaded PDF can go
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                pass
 
 # Initialize processing manager
 processing_manager = ProcessingManager()
 
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    """Reject oversized uploads from their Content-Length, before the body is read"""
+    if request.url.path == "/upload":
+        length = request.headers.get("content-length", "")
+        if length.isdigit() and int(length) > MAX_FILE_SIZE + MULTIPART_OVERHEAD:
+            return ORJSONResponse(
+                status_code=413,
+                content={'detail': f"File too large. Maximum size is {MAX_FILE_SIZE/1024/1024:.1f}MB"}
+            )
+    return await call_next(request)
+
 @app.post("/upload")
 async def upload_file(
     file: UploadFile = File(...),
@@ -277,50 +401,46 @@ async def upload_file(
         )
     
     try:
-        # Create temporary file with automatic cleanup
-        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_file:
-            temp_path = temp_file.name
-            content = await file.read()
-            
-            # Check file size
-            if len(content) > MAX_FILE_SIZE:
-                raise HTTPException(
-                    status_code=413,
-                    detail=f"File too large. Maximum size is {MAX_FILE_SIZE/1024/1024:.1f}MB"
-                )
-            
-            temp_file.write(content)
+        # Starlette has already spooled the upload, so its size is known up
+        # front and oversized files are rejected without copying anything
+        size = await asyncio.to_thread(get_upload_size, file.file)
+        if size > MAX_FILE_SIZE:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File too large. Maximum size is {MAX_FILE_SIZE/1024/1024:.1f}MB"
+            )
+        temp_path = await asyncio.to_thread(save_upload, file.file, size)
         
-        # Create temporary directory for chunks
-        with temporary_directory() as chunk_dir:
+        try:
             # Split into chunks
-            chunker = PDFChunker(temp_path, CHUNK_SIZE, CHUNK_OVERLAP, chunk_dir)
+            chunker = PDFChunker(temp_path, CHUNK_SIZE, CHUNK_OVERLAP)
             chunks = await chunker.process()
             
-            # Create processing job
+            # Create processing job; the uploaded PDF stays in the shared volume
+            # until every chunk has been processed
             job_id = await processing_manager.create_job(file.filename, chunks)
-            
-            # Start processing chunks
-            for chunk in chunks:
-                background_tasks.add_task(
-                    processing_manager.process_chunk,
-                    job_id,
-                    chunk
-                )
-            
-            # Clean up uploaded file
-            try:
-                os.remove(temp_path)
-            except Exception as e:
-                logger.error(f"Error removing temporary file {temp_path}: {e}")
+        except BaseException:
+            # No job will process the upload, so don't leave it behind
+            os.remove(temp_path)
+            raise
         
-        return JSONResponse({
+        # Process the chunks and finalize the job in the background
+        background_tasks.add_task(
+            processing_manager.run_job,
+            job_id,
+            temp_path,
+            chunks
+        )
+        
+        return ORJSONResponse({
             'job_id': job_id,
             'file_name': file.filename,
             'total_pages': chunker.total_pages,
             'total_chunks': len(chunks)
         })
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error processing upload: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -328,34 +448,64 @@ async def upload_file(
 @app.get("/status/{job_id}")
 async def get_status(job_id: str):
     """Get job status"""
-    if job_id not in processing_manager.jobs:
+    job = await processing_manager.get_job(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    job = processing_manager.jobs[job_id]
-    return {
-        'id': job['id'],
-        'status': job['status'],
-        'file_name': job['file_name'],
-        'progress': {
-            'completed_chunks': job['completed_chunks'],
-            'total_chunks': job['total_chunks'],
-            'percentage': (job['completed_chunks'] / job['total_chunks']) * 100
-        },
-        'error': job.get('error')
-    }
+    return job_status(job)
+
+@app.get("/status-stream/{job_id}")
+async def stream_status(job_id: str):
+    """Stream job status as server-sent events, one per change"""
+    # Subscribe before reading the current state so no update is missed
+    pubsub = processing_manager.redis.pubsub()
+    await pubsub.subscribe(events_key(job_id))
+    job = await processing_manager.get_job(job_id)
+    if job is None:
+        await pubsub.aclose()
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    async def event_generator():
+        try:
+            status = job_status(job)
+            yield f"data: {orjson.dumps(status).decode()}\n\n"
+            finished = status['status'] in ('completed', 'error')
+            while not finished:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True,
+                    timeout=STATUS_STREAM_TIMEOUT
+                )
+                if message is None:
+                    # Keep idle connections open through proxies
+                    yield ": keepalive\n\n"
+                    continue
+                # Published payloads are already the status JSON
+                yield f"data: {message['data']}\n\n"
+                finished = orjson.loads(message['data'])['status'] in ('completed', 'error')
+        finally:
+            await pubsub.aclose()
+    
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={
+            'Cache-Control': 'no-store',
+            'X-Accel-Buffering': 'no'
+        }
+    )
 
 @app.get("/result/{job_id}")
 async def get_result(job_id: str):
-    """Get job results"""
-    if job_id not in processing_manager.jobs:
+    """Get job results; they expire JOB_TTL seconds after the job finishes"""
+    job = await processing_manager.get_job(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    job = processing_manager.jobs[job_id]
     if job['status'] != 'completed':
         raise HTTPException(status_code=400, detail="Job not completed")
     
     return {
         'id': job['id'],
         'file_name': job['file_name'],
-        'results': job['results']
+        'results': await processing_manager.get_results(job_id, job['total_chunks'])
     }
@@ -110,21 +110,18 @@ async function handleFile(file) {
         updateProgress(processingProgress, 0, 'PDF uploaded, starting processing...');
         updateProgress(uploadProgress, 100, 'Upload complete');
 
-        // Start polling for status
-        const pollInterval = setInterval(async () => {
+        // Follow status updates pushed by the server
+        const events = new EventSource(`/status-stream/${jobId}`);
+        events.onmessage = async (event) => {
             try {
-                const statusResponse = await fetch(`/status/${jobId}`);
-                if (!statusResponse.ok) {
-                    throw new Error('Failed to get status');
-                }
-                const statusData = await statusResponse.json();
+                const statusData = JSON.parse(event.data);
                 
                 const percent = (statusData.progress.completed_chunks / statusData.progress.total_chunks) * 100;
                 const statusMessage = `Processing chunks: ${statusData.progress.completed_chunks}/${statusData.progress.total_chunks}`;
                 updateProgress(processingProgress, percent, statusMessage);
 
                 if (statusData.status === 'completed') {
-                    clearInterval(pollInterval);
+                    events.close();
                     
                     // Get final results
                     const resultResponse = await fetch(`/result/${jobId}`);
@@ -145,15 +142,22 @@ async function handleFile(file) {
                     updateProgress(uploadProgress, 100, 'Upload complete');
                     updateProgress(processingProgress, 100, 'Processing complete');
                 } else if (statusData.status === 'error') {
-                    clearInterval(pollInterval);
+                    events.close();
                     throw new Error(statusData.error || 'Processing failed');
                 }
             } catch (error) {
-                clearInterval(pollInterval);
+                events.close();
                 console.error('Status check error:', error);
                 updateProgress(processingProgress, 100, `Error: ${error.message}`);
             }
-        }, 1000);
+        };
+        events.onerror = () => {
+            // EventSource reconnects on its own unless the stream was refused
+            if (events.readyState === EventSource.CLOSED) {
+                console.error('Status stream closed');
+                updateProgress(processingProgress, 100, 'Error: Failed to get status');
+            }
+        };
 
     } catch (error) {
         console.error('Error:', error);
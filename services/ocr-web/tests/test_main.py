@@ -0,0 +1,185 @@
+import pytest
+import asyncio
+import os
+import json
+import tempfile
+import pikepdf
+import httpx
+from fakeredis import aioredis
+
+from app import main
+from app.main import app, processing_manager, PDFChunker, events_key
+
+@pytest.fixture
+async def fake_redis():
+    """Point the processing manager at an in-memory Redis for each test"""
+    redis = aioredis.FakeRedis(decode_responses=True)
+    await redis.flushall()
+    real_redis, processing_manager.redis = processing_manager.redis, redis
+    yield redis
+    processing_manager.redis = real_redis
+    await redis.aclose()
+
+@pytest.fixture
+async def client(fake_redis):
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        yield client
+
+def create_test_pdf(pages: int) -> str:
+    """Write a PDF with the given number of blank pages and return its path"""
+    fd, path = tempfile.mkstemp(suffix='.pdf')
+    os.close(fd)
+    with pikepdf.new() as pdf:
+        for _ in range(pages):
+            pdf.add_blank_page()
+        pdf.save(path)
+    return path
+
+class FakeResponse:
+    status = 200
+    
+    def __init__(self, payload):
+        self.payload = payload
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc):
+        return False
+    
+    async def json(self, loads=json.loads):
+        return self.payload
+
+class FakeSession:
+    """Stands in for the processing agent, recording each chunk request"""
+    def __init__(self):
+        self.requests = []
+    
+    def post(self, url, json):
+        self.requests.append(json)
+        return FakeResponse({'status': 'success', 'result': {'content': json['chunk_id']}})
+
+async def test_chunker_overlapping_ranges():
+    """Larger PDFs are split into overlapping page ranges"""
+    path = create_test_pdf(10)
+    try:
+        chunker = PDFChunker(path, 4, 1)
+        chunks = await chunker.process()
+    finally:
+        os.remove(path)
+    
+    assert chunker.total_pages == 10
+    assert [(c['start_page'], c['end_page']) for c in chunks] == [(1, 4), (4, 7), (7, 10)]
+    assert not any(c['whole_file'] for c in chunks)
+
+async def test_chunker_whole_file():
+    """A PDF that fits in one chunk is flagged as the whole file"""
+    path = create_test_pdf(3)
+    try:
+        chunks = await PDFChunker(path, 4, 1).process()
+    finally:
+        os.remove(path)
+    
+    assert [(c['start_page'], c['end_page'], c['whole_file']) for c in chunks] == [(1, 3, True)]
+
+async def test_run_job(fake_redis, client, monkeypatch):
+    """Chunks are sent as page ranges and the job completes in page order"""
+    monkeypatch.setattr(processing_manager, 'session', FakeSession())
+    path = create_test_pdf(10)
+    chunks = await PDFChunker(path, 4, 1).process()
+    job_id = await processing_manager.create_job('rules.pdf', chunks)
+    
+    await processing_manager.run_job(job_id, path, chunks)
+    
+    requests = processing_manager.session.requests
+    assert sorted(r['page_range']['start'] for r in requests) == [1, 4, 7]
+    assert not os.path.exists(path)
+    
+    status = (await client.get(f"/status/{job_id}")).json()
+    assert status['status'] == 'completed'
+    assert status['progress']['completed_chunks'] == 3
+    
+    result = (await client.get(f"/result/{job_id}")).json()
+    assert [r['result']['content'] for r in result['results']] == [c['id'] for c in chunks]
+    assert [r['page_range']['start'] for r in result['results']] == [1, 4, 7]
+
+async def test_run_job_whole_file(fake_redis, monkeypatch):
+    """A single whole-file chunk is sent without a page range"""
+    monkeypatch.setattr(processing_manager, 'session', FakeSession())
+    path = create_test_pdf(3)
+    chunks = await PDFChunker(path, 4, 1).process()
+    job_id = await processing_manager.create_job('rules.pdf', chunks)
+    
+    await processing_manager.run_job(job_id, path, chunks)
+    
+    assert [r['page_range'] for r in processing_manager.session.requests] == [None]
+
+async def test_upload_removed_when_job_creation_fails(client, monkeypatch, tmp_path):
+    """The saved upload is removed if no job is created for it"""
+    async def failing_create_job(file_name, chunks):
+        raise ConnectionError("redis down")
+    
+    monkeypatch.setattr(main, 'TEMP_DIR', str(tmp_path))
+    monkeypatch.setattr(main, 'check_disk_space', lambda: True)
+    monkeypatch.setattr(processing_manager, 'create_job', failing_create_job)
+    path = create_test_pdf(3)
+    try:
+        with open(path, 'rb') as f:
+            response = await client.post("/upload", files={'file': ('rules.pdf', f, 'application/pdf')})
+    finally:
+        os.remove(path)
+    
+    assert response.status_code == 500
+    assert list(tmp_path.iterdir()) == []
+
+async def test_status_unknown_job(client):
+    response = await client.get("/status/no-such-job")
+    assert response.status_code == 404
+
+async def test_run_job_failed_chunk(fake_redis, client, monkeypatch):
+    """A failed chunk leaves the job errored, and the upload is still removed"""
+    session = FakeSession()
+    session.post = lambda url, json: FakeResponse({'status': 'error', 'message': 'model error'})
+    monkeypatch.setattr(processing_manager, 'session', session)
+    path = create_test_pdf(2)
+    chunks = await PDFChunker(path, 10, 2).process()
+    job_id = await processing_manager.create_job('rules.pdf', chunks)
+    
+    await processing_manager.run_job(job_id, path, chunks)
+    
+    status = (await client.get(f"/status/{job_id}")).json()
+    assert status['status'] == 'error'
+    assert status['error'] == 'model error'
+    assert not os.path.exists(path)
+
+def stream_events(response) -> list:
+    return [json.loads(line[len("data: "):]) for line in response.text.splitlines() if line.startswith("data: ")]
+
+async def test_status_stream_unknown_job(client):
+    """Streams for unknown jobs are rejected"""
+    response = await client.get("/status-stream/no-such-job")
+    assert response.status_code == 404
+
+async def test_status_stream_finished_job(fake_redis, client):
+    """A finished job's stream sends its final status and ends"""
+    job_id = await processing_manager.create_job('rules.pdf', [{'id': 'a'}])
+    await processing_manager.finalize_job(job_id, '/nonexistent.pdf')
+    
+    response = await client.get(f"/status-stream/{job_id}")
+    
+    assert response.status_code == 200
+    assert 'no-store' in response.headers['cache-control']
+    assert [e['status'] for e in stream_events(response)] == ['completed']
+
+async def test_status_stream_pushes_updates(fake_redis, client):
+    """Status changes published while a client is connected are streamed to it"""
+    job_id = await processing_manager.create_job('rules.pdf', [{'id': 'a'}])
+    stream = asyncio.create_task(client.get(f"/status-stream/{job_id}"))
+    
+    # Wait for the stream to subscribe before finishing the job
+    while (await fake_redis.pubsub_numsub(events_key(job_id)))[0][1] == 0:
+        await asyncio.sleep(0.01)
+    await processing_manager.finalize_job(job_id, '/nonexistent.pdf')
+    
+    response = await asyncio.wait_for(stream, timeout=5)
+    assert [e['status'] for e in stream_events(response)] == ['processing', 'completed']